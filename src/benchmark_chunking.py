@@ -0,0 +1,227 @@
+"""
+Compares the wall-clock time of a Summary with fixed size chunks against
+chunks picked by the ChunkPlanner, at the same concurrency. The backend is
+simulated: every call takes a fixed request cost plus a cost per prompt word,
+and requests running at the same time share the backend like parallel slots
+on a single GPU. Each other request in flight slows a call down by the
+contention of the scenario.
+
+Two scenarios are run. With a small context the fixed chunks already fill
+every slot, so there is little for the planner to gain. With a large context
+the fixed chunks leave slots idle and the planner splits the text further.
+
+Usage: python benchmark_chunking.py
+"""
+
+import random
+import threading
+import time
+from typing import Generator
+
+from nltk.tokenize import word_tokenize
+
+from chunk_planner import BackendProfile, ChunkPlanner
+from chunked_text import AdaptiveChunkedText, OllamaChunkedText
+from summary import Summary
+from typings import IChunkedText, IThroughputObserver
+
+SUMMARY_WORDS = 250
+OVERLAP = 4
+CONCURRENCY = 4
+STEP_SECONDS = 0.005
+
+
+class Scenario:
+    _name: str
+    _request_seconds: float
+    _words_per_second: float
+    _contention: float
+    _max_words_per_chunk: int
+    _number_of_words: int
+
+    def __init__(
+        self,
+        name: str,
+        request_seconds: float,
+        words_per_second: float,
+        contention: float,
+        max_words_per_chunk: int,
+        number_of_words: int,
+    ) -> None:
+        self._name = name
+        self._request_seconds = request_seconds
+        self._words_per_second = words_per_second
+        self._contention = contention
+        self._max_words_per_chunk = max_words_per_chunk
+        self._number_of_words = number_of_words
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def request_seconds(self) -> float:
+        return self._request_seconds
+
+    @property
+    def words_per_second(self) -> float:
+        return self._words_per_second
+
+    @property
+    def contention(self) -> float:
+        return self._contention
+
+    @property
+    def max_words_per_chunk(self) -> int:
+        return self._max_words_per_chunk
+
+    @property
+    def number_of_words(self) -> int:
+        return self._number_of_words
+
+
+SCENARIOS = [
+    Scenario(
+        "Small context (summarise.py defaults)",
+        request_seconds=0.2,
+        words_per_second=1000,
+        contention=0.5,
+        max_words_per_chunk=1200,
+        number_of_words=12_000,
+    ),
+    Scenario(
+        "Large context",
+        request_seconds=0.2,
+        words_per_second=4000,
+        contention=0.1,
+        max_words_per_chunk=8000,
+        number_of_words=12_000,
+    ),
+]
+
+
+class SimulatedGen:
+    _scenario: Scenario
+    _in_flight: int
+
+    def __init__(self, scenario: Scenario) -> None:
+        self._scenario = scenario
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        pass
+
+    def generate_stream(
+        self, system_message: str, prompt: str
+    ) -> Generator[str, None, None]:
+        yield self.generate_response(system_message, prompt)
+
+    def generate_response(self, system_message: str, prompt: str) -> str:
+        work = (
+            self._scenario.request_seconds
+            + len(prompt.split()) / self._scenario.words_per_second
+        )
+        with self._lock:
+            self._in_flight += 1
+        try:
+            while work > 0:
+                with self._lock:
+                    slowdown = 1 + self._scenario.contention * (self._in_flight - 1)
+                time.sleep(STEP_SECONDS)
+                work -= STEP_SECONDS / slowdown
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        return make_text(SUMMARY_WORDS)
+
+
+def make_text(number_of_words: int) -> str:
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur"]
+    sentences = list()
+    while number_of_words > 0:
+        length = min(number_of_words, random.randint(8, 20))
+        sentences.append(" ".join(random.choices(words, k=length)).capitalize() + ".")
+        number_of_words -= length + 1
+    return " ".join(sentences)
+
+
+def run(
+    name: str,
+    scenario: Scenario,
+    chunked_text: IChunkedText,
+    concurrency: int,
+    text: str,
+    observer: IThroughputObserver | None = None,
+) -> float:
+    summary = Summary(
+        SimulatedGen(scenario),
+        chunked_text,
+        text,
+        concurrency=concurrency,
+        observer=observer,
+    )
+    start_time = time.perf_counter()
+    for _ in summary.text():
+        pass
+    seconds = time.perf_counter() - start_time
+    print(f"{name}: {seconds:.2f} seconds")
+    return seconds
+
+
+def run_scenario(scenario: Scenario):
+    print(f"\n{scenario.name}")
+    random.seed(0)
+    text = make_text(scenario.number_of_words)
+
+    results = dict()
+    results["fixed, sequential"] = run(
+        "fixed, sequential",
+        scenario,
+        OllamaChunkedText(
+            max_words_per_chunk=scenario.max_words_per_chunk, overlap=OVERLAP
+        ),
+        1,
+        text,
+    )
+    results["fixed, concurrent"] = run(
+        "fixed, concurrent",
+        scenario,
+        OllamaChunkedText(
+            max_words_per_chunk=scenario.max_words_per_chunk, overlap=OVERLAP
+        ),
+        CONCURRENCY,
+        text,
+    )
+    # The first adaptive run plans its first level from the priors, like the
+    # first run of summarise.py. The second reuses the profile measured by the
+    # first, like later runs that load the saved profile.
+    planner = ChunkPlanner(
+        BackendProfile(),
+        max_chunk_size=scenario.max_words_per_chunk,
+        concurrency=CONCURRENCY,
+    )
+    for name in ("adaptive, priors", "adaptive, measured profile"):
+        adaptive = AdaptiveChunkedText.for_ollama(planner, overlap=OVERLAP)
+        print(f"First level plan: {planner.plan(len(word_tokenize(text)))}")
+        results[name] = run(
+            name, scenario, adaptive, CONCURRENCY, text, observer=adaptive
+        )
+
+    print(
+        f"Fitted contention: {planner.profile.contention:.2f} "
+        f"(simulated: {scenario.contention:.2f})"
+    )
+    baseline = results["fixed, concurrent"]
+    print("Compared to fixed, concurrent:")
+    for name, seconds in results.items():
+        print(f"  {name}: {baseline / seconds:.2f}x")
+
+
+def benchmark():
+    for scenario in SCENARIOS:
+        run_scenario(scenario)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,227 @@
+"""
+Compares the per-call prompt eval and load time of LlamaGen jobs with the
+server's default keep-alive against a long keep-alive. The chunk calls run
+through Summary with the same concurrency as summarise.py.
+
+By default the calls go to a local stand-in for the Ollama server. It loads
+the model on demand and unloads it after the keep-alive expires. Like the
+real server it has a number of parallel slots, each caching the last prompt
+it evaluated, and a request goes to the idle slot sharing the longest prefix
+with it. A run with the prompt cache turned off shows what the cache saves.
+Slots don't slow each other down, and durations are scaled down so that a
+run takes a few seconds.
+
+Usage: python benchmark_ollama.py [ollama_host]
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from models import LlamaGen
+from summary import Summary
+
+LOAD_SECONDS = 0.5
+PROMPT_TOKENS_PER_SECOND = 2000
+EVAL_TOKENS_PER_SECOND = 400
+RESPONSE_TOKENS = 40
+NUM_PARALLEL = 4
+DEFAULT_KEEP_ALIVE_SECONDS = 1.0
+SECONDS_BETWEEN_JOBS = 1.5
+CONCURRENCY = 4
+CHUNKS_PER_JOB = 8
+WORDS_PER_CHUNK = 150
+KEEP_ALIVE = "10m"
+
+
+class StandInOllama:
+    _cache_prompt: bool
+    _loaded_until: float
+    _slots: list[list[str]]
+    _busy: list[bool]
+
+    def __init__(self, cache_prompt: bool = True) -> None:
+        self._cache_prompt = cache_prompt
+        self._loaded_until = 0.0
+        self._slots = [list() for _ in range(NUM_PARALLEL)]
+        self._busy = [False] * NUM_PARALLEL
+        self._condition = threading.Condition()
+
+    def generate(self, request: dict) -> dict:
+        start_time = time.perf_counter()
+        tokens = list()
+        if request["prompt"]:
+            tokens = (request.get("system", "") + " " + request["prompt"]).split()
+
+        with self._condition:
+            self._condition.wait_for(lambda: not all(self._busy))
+            load_seconds = 0.0
+            if time.monotonic() > self._loaded_until:
+                # Other requests wait for the model to load
+                load_seconds = LOAD_SECONDS
+                time.sleep(load_seconds)
+                self._slots = [list() for _ in range(NUM_PARALLEL)]
+            slot, cached = max(
+                (
+                    (i, self._common_prefix(cached_tokens, tokens))
+                    for i, cached_tokens in enumerate(self._slots)
+                    if not self._busy[i]
+                ),
+                key=lambda slot_and_cached: slot_and_cached[1],
+            )
+            self._busy[slot] = True
+
+        if not self._cache_prompt:
+            cached = 0
+        prompt_eval_count = len(tokens) - cached
+        prompt_eval_seconds = prompt_eval_count / PROMPT_TOKENS_PER_SECOND
+        eval_count = RESPONSE_TOKENS if tokens else 0
+        eval_seconds = eval_count / EVAL_TOKENS_PER_SECOND
+        time.sleep(prompt_eval_seconds + eval_seconds)
+
+        with self._condition:
+            if tokens:
+                self._slots[slot] = tokens
+            self._busy[slot] = False
+            self._loaded_until = time.monotonic() + self._keep_alive_seconds(
+                request.get("keep_alive")
+            )
+            self._condition.notify()
+
+        return {
+            "model": request["model"],
+            "response": " ".join(["summary"] * eval_count),
+            "done": True,
+            "total_duration": int((time.perf_counter() - start_time) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": prompt_eval_count,
+            "prompt_eval_duration": int(prompt_eval_seconds * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_seconds * 1e9),
+        }
+
+    @staticmethod
+    def _common_prefix(cached_tokens: list[str], tokens: list[str]) -> int:
+        cached = 0
+        for cached_token, token in zip(cached_tokens, tokens):
+            if cached_token != token:
+                break
+            cached += 1
+        return cached
+
+    @staticmethod
+    def _keep_alive_seconds(keep_alive: str | float | None) -> float:
+        if keep_alive is None:
+            return DEFAULT_KEEP_ALIVE_SECONDS
+        if isinstance(keep_alive, (int, float)):
+            return float(keep_alive)
+        units = {"s": 1, "m": 60, "h": 3600}
+        if keep_alive[-1] in units:
+            return float(keep_alive[:-1]) * units[keep_alive[-1]]
+        return float(keep_alive)
+
+
+def start_stand_in(cache_prompt: bool = True) -> str:
+    stand_in = StandInOllama(cache_prompt)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            request = json.loads(self.rfile.read(length))
+            body = json.dumps(stand_in.generate(request)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class SentenceChunkedText:
+    """
+    One chunk per sentence, so every job has CHUNKS_PER_JOB chunk calls and
+    the joined summaries, which have no full stops, fit in a single chunk.
+    """
+
+    def chunks(self, source_text: str) -> list[list[str]]:
+        sentences = [s.strip() for s in re.findall(r"[^.]+\.?", source_text)]
+        return [[sentence] for sentence in sentences if sentence]
+
+
+def make_text() -> str:
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur"]
+    return " ".join(
+        " ".join(random.choices(words, k=WORDS_PER_CHUNK)) + "."
+        for _ in range(CHUNKS_PER_JOB)
+    )
+
+
+def run_jobs(
+    name: str, keep_alive: str | None, cache_prompt: bool = True, jobs: int = 2
+) -> float:
+    """
+    Summarises a few texts on a cold server. Each job starts with a warm-up
+    like summarise.py does.
+    """
+    print(f"\n{name}")
+    host = sys.argv[1] if len(sys.argv) > 1 else start_stand_in(cache_prompt)
+    llama_gen = LlamaGen(keep_alive=keep_alive, host=host, verbose=True)
+    total_seconds = 0.0
+    for job in range(jobs):
+        if job > 0:
+            time.sleep(SECONDS_BETWEEN_JOBS)
+        llama_gen.reset_stats()
+        summary = Summary(
+            llama_gen, SentenceChunkedText(), make_text(), concurrency=CONCURRENCY
+        )
+        start_time = time.perf_counter()
+        llama_gen.warm_up()
+        for _ in summary.text():
+            pass
+        job_seconds = time.perf_counter() - start_time
+        total_seconds += job_seconds
+
+        stats = llama_gen.stats
+        prompt_eval_count = sum(s.prompt_eval_count for s in stats)
+        prompt_eval_seconds = sum(s.prompt_eval_seconds for s in stats)
+        load_seconds = sum(s.load_seconds for s in stats)
+        print(
+            f"Job {job + 1}: prompt eval {prompt_eval_count} tokens in "
+            f"{prompt_eval_seconds:.2f}s, load {load_seconds:.2f}s, "
+            f"wall-clock {job_seconds:.2f}s over {len(stats)} calls"
+        )
+
+    print(f"Total: {total_seconds:.2f}s")
+    return total_seconds
+
+
+def benchmark():
+    random.seed(0)
+    results = dict()
+    results["Server defaults"] = run_jobs("Server defaults", None)
+    time.sleep(SECONDS_BETWEEN_JOBS)
+    results["Keep-alive"] = run_jobs("Keep-alive", KEEP_ALIVE)
+    if len(sys.argv) < 2:
+        # The prompt cache can only be turned off on the stand-in
+        results["Keep-alive, no prompt cache"] = run_jobs(
+            "Keep-alive, no prompt cache", KEEP_ALIVE, cache_prompt=False
+        )
+
+    baseline = results["Server defaults"]
+    print()
+    for name, seconds in results.items():
+        print(f"{name}: {baseline / seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
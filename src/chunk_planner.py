@@ -0,0 +1,370 @@
+import json
+import math
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+
+class ChunkPlannerError(Exception):
+    pass
+
+
+class BackendProfile:
+    """
+    Measured throughput of a generation backend. A call is modelled as a
+    fixed cost per request (network, scheduling and generating the summary)
+    plus a cost per unit (word or token) of prompt. Requests running at the
+    same time share the backend, so every other request in flight slows a
+    call down by `contention` times its uncontended duration.
+    """
+
+    _request_seconds: float
+    _seconds_per_unit: float
+    _summary_units: float
+    _contention: float
+    _samples: list[tuple[int, int, float, float]]
+    _max_samples: int
+
+    def __init__(
+        self,
+        request_seconds: float = 4.0,
+        units_per_second: float = 400.0,
+        summary_units: int = 250,
+        contention: float = 0.5,
+        max_samples: int = 64,
+    ) -> None:
+        """
+        Args:
+            request_seconds (float, optional): Prior for the fixed cost of a
+            single request in seconds. Defaults to 4.0.
+
+            units_per_second (float, optional): Prior for the rate at which
+            the prompt is processed. Defaults to 400.0.
+
+            summary_units (int, optional): Prior for the length of a chunk
+            summary. Defaults to 250.
+
+            contention (float, optional): Prior for the slowdown caused by
+            each additional request in flight. 0 means that requests don't
+            affect each other and 1 means that they run one after another.
+            Defaults to 0.5.
+
+            max_samples (int, optional): Number of most recent observations
+            used to refit the profile. Defaults to 64.
+        """
+        if (
+            request_seconds < 0
+            or units_per_second <= 0
+            or summary_units < 1
+            or not 0 <= contention <= 1
+        ):
+            raise ChunkPlannerError("Invalid backend profile.")
+        self._request_seconds = request_seconds
+        self._seconds_per_unit = 1 / units_per_second
+        self._summary_units = summary_units
+        self._contention = contention
+        self._samples = list()
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+
+    @property
+    def request_seconds(self) -> float:
+        return self._request_seconds
+
+    @property
+    def seconds_per_unit(self) -> float:
+        return self._seconds_per_unit
+
+    @property
+    def summary_units(self) -> int:
+        return max(1, round(self._summary_units))
+
+    @property
+    def contention(self) -> float:
+        return self._contention
+
+    def slowdown(self, in_flight: float) -> float:
+        return 1 + self._contention * (max(1, in_flight) - 1)
+
+    def observe(
+        self,
+        prompt_units: int,
+        response_units: int,
+        seconds: float,
+        in_flight: float = 1.0,
+    ):
+        """
+        Args:
+            prompt_units (int): Size of the prompt.
+
+            response_units (int): Size of the response.
+
+            seconds (float): Wall-clock time of the call.
+
+            in_flight (float, optional): Average number of requests running
+            at the same time during the call, weighted by time and including
+            this one. Defaults to 1.0.
+        """
+        with self._lock:
+            self._samples.append((prompt_units, response_units, seconds, in_flight))
+            self._samples = self._samples[-self._max_samples :]
+            self._fit()
+
+    def _fit(self):
+        n = len(self._samples)
+        self._summary_units = sum(s[1] for s in self._samples) / n
+        if n < 2:
+            return
+
+        # Fit the uncontended cost of a call on timings with the current
+        # slowdown taken out.
+        xs = [s[0] for s in self._samples]
+        ys = [s[2] / self.slowdown(s[3]) for s in self._samples]
+        fit = self._linear_fit(xs, ys)
+        if fit is None:
+            # All prompts were the same size, so only the total is known.
+            # Keep the current rate and attribute the rest to the request.
+            mean_x = sum(xs) / n
+            mean_y = sum(ys) / n
+            self._request_seconds = max(0.0, mean_y - mean_x * self._seconds_per_unit)
+        elif fit[1] > 0:
+            self._request_seconds = max(0.0, fit[0])
+            self._seconds_per_unit = fit[1]
+
+        # With calls made at different levels of concurrency, the ratio of
+        # measured to uncontended time gives the contention.
+        ks = [s[3] - 1 for s in self._samples]
+        ratios = [
+            s[2] / (self._request_seconds + s[0] * self._seconds_per_unit)
+            for s in self._samples
+        ]
+        fit = self._linear_fit(ks, ratios)
+        if fit is None or fit[0] <= 0:
+            return
+        scale, slope = fit
+        self._contention = min(1.0, max(0.0, slope / scale))
+        self._request_seconds *= scale
+        self._seconds_per_unit *= scale
+
+    def save(self, path: Path):
+        """
+        Saves the measured samples so that the next run plans its first level
+        from them instead of the priors.
+        """
+        with self._lock:
+            samples = list(self._samples)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(samples, f)
+
+    def load(self, path: Path) -> bool:
+        if not path.exists():
+            return False
+
+        with open(path, "r", encoding="utf-8") as f:
+            samples = [tuple(sample) for sample in json.load(f)]
+        with self._lock:
+            self._samples = (samples + self._samples)[-self._max_samples :]
+            if self._samples:
+                self._fit()
+        return True
+
+    @staticmethod
+    def _linear_fit(xs: list[float], ys: list[float]) -> tuple[float, float] | None:
+        """
+        Returns the intercept and slope of the least squares line, or None
+        when all the xs are the same.
+        """
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            return None
+        cov_xy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        slope = cov_xy / var_x
+        return mean_y - slope * mean_x, slope
+
+
+class ChunkPlan:
+    _chunk_size: int
+    _levels: list[int]
+    _estimated_seconds: float
+    _summary_units: int
+
+    def __init__(
+        self,
+        chunk_size: int,
+        levels: list[int],
+        estimated_seconds: float,
+        summary_units: int,
+    ) -> None:
+        self._chunk_size = chunk_size
+        self._levels = levels
+        self._estimated_seconds = estimated_seconds
+        self._summary_units = summary_units
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    @property
+    def levels(self) -> list[int]:
+        """
+        Number of chunks summarised at each level of the reduce tree. Empty
+        when the whole text fits in the final summary call.
+        """
+        return self._levels
+
+    @property
+    def fan_out(self) -> int:
+        """
+        Number of chunk summaries combined by a single chunk of this size.
+        """
+        return max(1, self._chunk_size // self._summary_units)
+
+    @property
+    def estimated_seconds(self) -> float:
+        return self._estimated_seconds
+
+    def __repr__(self) -> str:
+        return (
+            f"ChunkPlan(chunk_size={self.chunk_size}, levels={self.levels}, "
+            f"fan_out={self.fan_out}, estimated_seconds={self.estimated_seconds:.1f})"
+        )
+
+
+class ChunkPlanner:
+    """
+    Picks the chunk size that minimises the estimated wall-clock time of
+    summarising a text. Each level of the reduce tree runs its chunks in
+    waves of `concurrency` requests, slowed down by the contention between
+    them, and the next level works on the joined chunk summaries, so both
+    very large and very small chunks are slow.
+    """
+
+    _profile: BackendProfile
+    _max_chunk_size: int
+    _min_chunk_size: int
+    _concurrency: int
+    _slack: float = 1.1
+    # Extra waves are never cheaper than filling the current one, so the
+    # search stops a few waves past the fewest chunks that fit.
+    _extra_waves: int = 2
+
+    def __init__(
+        self,
+        profile: BackendProfile,
+        max_chunk_size: int,
+        concurrency: int = 1,
+        min_chunk_size: int = 100,
+    ) -> None:
+        """
+        Args:
+            profile (BackendProfile): Throughput of the backend used for the
+            summaries.
+
+            max_chunk_size (int): Largest chunk the model can take. Words or
+            tokens, matching the units of the profile.
+
+            concurrency (int, optional): Number of chunks summarised at the
+            same time. Defaults to 1.
+
+            min_chunk_size (int, optional): Smallest chunk worth sending.
+            Defaults to 100.
+        """
+        if concurrency < 1:
+            raise ChunkPlannerError("concurrency must be at least 1.")
+        if max_chunk_size < min_chunk_size:
+            raise ChunkPlannerError(
+                f"max_chunk_size must be at least {min_chunk_size} units long."
+            )
+        self._profile = profile
+        self._max_chunk_size = max_chunk_size
+        self._min_chunk_size = min_chunk_size
+        self._concurrency = concurrency
+
+    @property
+    def profile(self) -> BackendProfile:
+        return self._profile
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    def plan(self, text_units: int, overlap_units: int = 0) -> ChunkPlan:
+        """
+        Args:
+            text_units (int): Size of the text to summarise.
+
+            overlap_units (int, optional): Size of the overlap that every
+            chunk repeats from the previous one. Defaults to 0.
+        """
+        request_seconds = self._profile.request_seconds
+        seconds_per_unit = self._profile.seconds_per_unit
+        summary_units = self._profile.summary_units
+        slowdown = self._profile.slowdown
+        text_units = max(1, text_units)
+        overlap_units = min(max(0, overlap_units), self._max_chunk_size - 1)
+        new_units_per_chunk = self._max_chunk_size - overlap_units
+
+        def call_seconds(units: float) -> float:
+            return request_seconds + units * seconds_per_unit
+
+        def level_seconds(units: int, n: int) -> float:
+            full_waves, rest = divmod(n, self._concurrency)
+            waves_slowdown = full_waves * slowdown(min(n, self._concurrency))
+            if rest:
+                waves_slowdown += slowdown(rest)
+            return waves_slowdown * call_seconds(units / n + overlap_units)
+
+        @lru_cache(maxsize=None)
+        def best(units: int) -> tuple[float, int, tuple[int, ...]]:
+            """
+            Returns the estimated seconds, the number of chunks to split
+            into and the chunk counts of every level below this one. The
+            seconds are infinite when the text can't be reduced to a single
+            chunk.
+            """
+            options = list()
+            if units <= self._max_chunk_size:
+                options.append((call_seconds(units), 1, ()))
+
+            min_chunks = max(2, math.ceil(units / new_units_per_chunk))
+            max_chunks = min(
+                max(min_chunks, units // self._min_chunk_size),
+                math.ceil(min_chunks / self._concurrency + self._extra_waves)
+                * self._concurrency,
+            )
+            for n in range(min_chunks, max_chunks + 1):
+                next_units = n * summary_units
+                if next_units >= units:
+                    break
+                rest = best(next_units)
+                if math.isinf(rest[0]):
+                    continue
+                seconds = level_seconds(units, n) + rest[0]
+                options.append((seconds, n, (n,) + rest[2]))
+
+            if not options:
+                return (math.inf, 0, ())
+            return min(options)
+
+        seconds, n, levels = best(text_units)
+        if math.isinf(seconds):
+            # The summaries are too long for the tree to shrink the text.
+            # Split it into as few chunks as possible, as a fixed size
+            # chunker would.
+            n = math.ceil(text_units / new_units_per_chunk)
+            return ChunkPlan(
+                self._max_chunk_size, [n], level_seconds(text_units, n), summary_units
+            )
+
+        if n == 1:
+            chunk_size = self._max_chunk_size
+        else:
+            # Chunks end on sentence boundaries, so leave some room to stop
+            # a short trailing chunk from adding another wave.
+            chunk_size = math.ceil((text_units / n + overlap_units) * self._slack)
+            chunk_size = min(
+                self._max_chunk_size, max(self._min_chunk_size, chunk_size)
+            )
+        return ChunkPlan(chunk_size, list(levels), seconds, summary_units)
@@ -1,6 +1,12 @@
+import math
+from typing import Callable
+
 from nltk.tokenize import sent_tokenize, word_tokenize
 import tiktoken
 
+from chunk_planner import ChunkPlan, ChunkPlanner
+from typings import IChunkedText
+
 # import nltk
 
 # nltk.download("punkt")
@@ -93,6 +99,7 @@ class OpenAIChunkedText:
     _model: str
     _overlap: int
     _language: str
+    _max_tokens_per_chunk: int | None
     _max_context = {
         "gpt-4o": 128_000,
         "gpt-4-turbo": 128_000,
@@ -104,6 +111,7 @@ class OpenAIChunkedText:
         model: str = "gpt-3.5-turbo",
         overlap: int = 0,
         language: str = "english",
+        max_tokens_per_chunk: int | None = None,
     ):
         """
         Args:
@@ -112,19 +120,35 @@ class OpenAIChunkedText:
             overlap (int, optional): Number of overlapping sentences in chunks. Defaults to 0.
 
             language (str, optional): Defaults to "english".
+
+            max_tokens_per_chunk (int | None, optional): An upper limit on the
+            number of tokens per chunk. Defaults to the model's context length.
         """
         self._model = model
         self._overlap = overlap
         self._language = language
+        if max_tokens_per_chunk is not None and not (
+            1 <= max_tokens_per_chunk <= self.max_context
+        ):
+            raise OpenAIChunkedTextError(
+                f"max_tokens_per_chunk must be between 1 and {self.max_context} tokens long."
+            )
+        self._max_tokens_per_chunk = max_tokens_per_chunk
 
     @property
     def model(self) -> str:
         return self._model
 
     @property
-    def max_tokens_per_chunk(self) -> int:
+    def max_context(self) -> int:
         return self._max_context[self.model]
 
+    @property
+    def max_tokens_per_chunk(self) -> int:
+        if self._max_tokens_per_chunk is None:
+            return self.max_context
+        return self._max_tokens_per_chunk
+
     def chunks(self, source_text: str) -> list[list[str]]:
         self._create_chunks(source_text)
         assert self._chunks is not None
@@ -167,5 +191,122 @@ class OpenAIChunkedText:
         self._chunks = chunks
 
     def _num_tokens_from_string(self, text: str):
-        encoding = tiktoken.encoding_for_model(self.model)
+        return self.num_tokens(text, self.model)
+
+    @staticmethod
+    def num_tokens(text: str, model: str) -> int:
+        encoding = tiktoken.encoding_for_model(model)
         return len(encoding.encode(text))
+
+
+class AdaptiveChunkedText:
+    """
+    Picks the chunk size for every level of the reduce tree with a
+    ChunkPlanner, then hands the chunking over to a fixed size chunker.
+    Timings of the summary calls can be fed back with `observe` so that later
+    plans use the measured throughput of the backend.
+    """
+
+    _planner: ChunkPlanner
+    _create_chunker: Callable[[int], IChunkedText]
+    _count_units: Callable[[str], int]
+    _overlap: int
+    _language: str
+    _last_plan: ChunkPlan | None = None
+
+    def __init__(
+        self,
+        planner: ChunkPlanner,
+        create_chunker: Callable[[int], IChunkedText],
+        count_units: Callable[[str], int],
+        overlap: int = 0,
+        language: str = "english",
+    ) -> None:
+        """
+        Args:
+            planner (ChunkPlanner): Planner for the chunk size.
+
+            create_chunker (Callable[[int], IChunkedText]): Creates a chunker
+            for a given chunk size.
+
+            count_units (Callable[[str], int]): Counts the units (words or
+            tokens) of a text, matching the units of the chunker.
+
+            overlap (int, optional): Number of overlapping sentences in the
+            chunks of the chunker. Defaults to 0.
+
+            language (str, optional): Defaults to "english".
+        """
+        self._planner = planner
+        self._create_chunker = create_chunker
+        self._count_units = count_units
+        self._overlap = overlap
+        self._language = language
+
+    @classmethod
+    def for_ollama(
+        cls, planner: ChunkPlanner, overlap: int = 0, language: str = "english"
+    ) -> "AdaptiveChunkedText":
+        return cls(
+            planner,
+            lambda size: OllamaChunkedText(
+                max_words_per_chunk=size, overlap=overlap, language=language
+            ),
+            lambda text: len(word_tokenize(text, language=language)),
+            overlap,
+            language,
+        )
+
+    @classmethod
+    def for_openai(
+        cls,
+        planner: ChunkPlanner,
+        model: str = "gpt-3.5-turbo",
+        overlap: int = 0,
+        language: str = "english",
+    ) -> "AdaptiveChunkedText":
+        return cls(
+            planner,
+            lambda size: OpenAIChunkedText(
+                model=model,
+                overlap=overlap,
+                language=language,
+                max_tokens_per_chunk=size,
+            ),
+            lambda text: OpenAIChunkedText.num_tokens(text, model),
+            overlap,
+            language,
+        )
+
+    @property
+    def last_plan(self) -> ChunkPlan | None:
+        return self._last_plan
+
+    def chunks(self, source_text: str) -> list[list[str]]:
+        units = self._count_units(source_text)
+        self._last_plan = self._planner.plan(
+            units, self._overlap_units(source_text, units)
+        )
+        chunker = self._create_chunker(self._last_plan.chunk_size)
+        return chunker.chunks(source_text)
+
+    def observe(self, prompt: str, response: str, seconds: float, in_flight: float):
+        self._planner.profile.observe(
+            self._count_units(prompt),
+            self._count_units(response),
+            seconds,
+            in_flight,
+        )
+
+    def _overlap_units(self, source_text: str, units: int) -> int:
+        """
+        Estimates the units every chunk repeats from the previous one. The
+        chunkers carry a single sentence over to the next chunk whenever
+        overlap is set, so this is the average sentence length.
+        """
+        if self._overlap <= 0:
+            return 0
+        sentences = sent_tokenize(source_text, language=self._language)
+        if not sentences:
+            return 0
+        return math.ceil(units / len(sentences))
@@ -1,34 +1,168 @@
-from typing import Generator
+import threading
+from typing import Any, Generator, Mapping
 import ollama
 from openai import OpenAI
 
 
+class GenerationStats:
+    """
+    Timings reported by the Ollama server for a single call. Durations are
+    converted from nanoseconds to seconds.
+    """
+
+    _prompt_eval_count: int
+    _prompt_eval_seconds: float
+    _eval_count: int
+    _eval_seconds: float
+    _load_seconds: float
+    _total_seconds: float
+
+    def __init__(self, response: Mapping[str, Any]) -> None:
+        self._prompt_eval_count = response.get("prompt_eval_count", 0)
+        self._prompt_eval_seconds = response.get("prompt_eval_duration", 0) / 1e9
+        self._eval_count = response.get("eval_count", 0)
+        self._eval_seconds = response.get("eval_duration", 0) / 1e9
+        self._load_seconds = response.get("load_duration", 0) / 1e9
+        self._total_seconds = response.get("total_duration", 0) / 1e9
+
+    @property
+    def prompt_eval_count(self) -> int:
+        return self._prompt_eval_count
+
+    @property
+    def prompt_eval_seconds(self) -> float:
+        return self._prompt_eval_seconds
+
+    @property
+    def eval_count(self) -> int:
+        return self._eval_count
+
+    @property
+    def eval_seconds(self) -> float:
+        return self._eval_seconds
+
+    @property
+    def load_seconds(self) -> float:
+        return self._load_seconds
+
+    @property
+    def total_seconds(self) -> float:
+        return self._total_seconds
+
+    def __str__(self) -> str:
+        return (
+            f"prompt eval: {self.prompt_eval_count} tokens in {self.prompt_eval_seconds:.2f}s, "
+            f"eval: {self.eval_count} tokens in {self.eval_seconds:.2f}s, "
+            f"load: {self.load_seconds:.2f}s, total: {self.total_seconds:.2f}s"
+        )
+
+
 class LlamaGen:
     _model: str
+    _client: ollama.Client
+    _keep_alive: str | float | None
+    _options: ollama.Options | None
+    _verbose: bool
+    _stats: list[GenerationStats]
+
+    def __init__(
+        self,
+        model: str = "llama3",
+        keep_alive: str | float | None = "10m",
+        host: str | None = None,
+        options: ollama.Options | None = None,
+        verbose: bool = False,
+    ) -> None:
+        """
+        Args:
+            model (str, optional): Defaults to "llama3".
+
+            keep_alive (str | float | None, optional): How long the server
+            keeps the model loaded after a call. None uses the server's
+            default. Defaults to "10m".
 
-    def __init__(self, model: str = "llama3") -> None:
+            host (str | None, optional): Address of the Ollama server. None
+            uses OLLAMA_HOST or the local default. Defaults to None.
+
+            options (ollama.Options | None, optional): Model options sent with
+            every call. These must stay the same for the server to reuse the
+            loaded model and its prompt cache. Calls share the system message
+            and the start of their prompt, so the server only evaluates the
+            rest of each prompt while the model stays loaded. Defaults to None.
+
+            verbose (bool, optional): Print the timings of every call.
+            Defaults to False.
+        """
         self._model = model
+        self._client = ollama.Client(host=host)
+        self._keep_alive = keep_alive
+        self._options = options
+        self._verbose = verbose
+        self._stats = list()
+        self._lock = threading.Lock()
 
     @property
     def model(self) -> str:
         return self._model
 
+    @property
+    def stats(self) -> list[GenerationStats]:
+        """
+        Timings of every call completed since the last reset, in order of
+        completion.
+        """
+        with self._lock:
+            return list(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = list()
+
+    def warm_up(self):
+        """
+        Loads the model without generating anything.
+        """
+        response = self._client.generate(
+            model=self.model, options=self._options, keep_alive=self._keep_alive
+        )
+        self._record(response)  # type: ignore
+
     def generate_stream(
         self, system_message: str, prompt: str
     ) -> Generator[str, None, None]:
-        stream = ollama.generate(
-            model=self.model, prompt=prompt, system=system_message, stream=True
+        stream = self._client.generate(
+            model=self.model,
+            prompt=prompt,
+            system=system_message,
+            stream=True,
+            options=self._options,
+            keep_alive=self._keep_alive,
         )
         for chunk in stream:
             if chunk["response"]:  # type: ignore
                 yield chunk["response"]  # type: ignore
+            if chunk["done"]:  # type: ignore
+                self._record(chunk)  # type: ignore
 
     def generate_response(self, system_message: str, prompt: str) -> str:
-        message = ollama.generate(
-            model=self.model, prompt=prompt, system=system_message
+        message = self._client.generate(
+            model=self.model,
+            prompt=prompt,
+            system=system_message,
+            options=self._options,
+            keep_alive=self._keep_alive,
         )
+        self._record(message)  # type: ignore
         return message["response"]  # type: ignore
 
+    def _record(self, response: Mapping[str, Any]):
+        stats = GenerationStats(response)
+        with self._lock:
+            self._stats.append(stats)
+            # Print under the lock so lines from concurrent calls don't mix
+            if self._verbose:
+                print(stats)
+
 
 class OpenAIGen:
     _model: str
@@ -42,6 +176,9 @@ class OpenAIGen:
     def model(self) -> str:
         return self._model
 
+    def warm_up(self):
+        pass
+
     def generate_stream(
         self, system_message: str, prompt: str
     ) -> Generator[str, None, None]:
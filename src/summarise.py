@@ -1,7 +1,8 @@
 import sys
 from pathlib import Path
 
-from chunked_text import OllamaChunkedText, OpenAIChunkedText
+from chunk_planner import BackendProfile, ChunkPlanner
+from chunked_text import AdaptiveChunkedText, OpenAIChunkedText
 from models import LlamaGen, OpenAIGen
 from summary import Summary
 
@@ -11,6 +12,7 @@ if str(BASE_DIR) not in sys.path:
     sys.path.append(str(BASE_DIR))
 
 DATA_DIR = BASE_DIR.parent / "data"
+CONCURRENCY = 4
 
 from downloaded_video import DownloadedVideo, DownloadStatus
 from transcript import Transcript
@@ -24,14 +26,35 @@ def summarise():
     yt_link = sys.argv[1]
     video_text = get_video_text(yt_link)
 
-    chunked_text = OllamaChunkedText(max_words_per_chunk=1200, overlap=4)
     llama_gen = LlamaGen()
-    # chunked_text = OpenAIChunkedText(overlap=4)
+    profile = BackendProfile()
+    profile_path = DATA_DIR / f"{llama_gen.model}_profile.json"
+    if profile.load(profile_path):
+        print("Saved backend profile found. Loading...")
+    planner = ChunkPlanner(profile, max_chunk_size=1200, concurrency=CONCURRENCY)
+    chunked_text = AdaptiveChunkedText.for_ollama(planner, overlap=4)
     # llama_gen = OpenAIGen()
-    summary = Summary(llama_gen, chunked_text, video_text)
+    # profile = BackendProfile(request_seconds=2.0, units_per_second=5000.0)
+    # profile_path = DATA_DIR / f"{llama_gen.model}_profile.json"
+    # profile.load(profile_path)
+    # planner = ChunkPlanner(
+    #     profile,
+    #     max_chunk_size=OpenAIChunkedText().max_context,
+    #     concurrency=CONCURRENCY,
+    # )
+    # chunked_text = AdaptiveChunkedText.for_openai(planner, overlap=4)
+    summary = Summary(
+        llama_gen,
+        chunked_text,
+        video_text,
+        concurrency=CONCURRENCY,
+        observer=chunked_text,
+    )
+    llama_gen.warm_up()
     for word in summary.text():
         print(word, end="", flush=True)
     print()
+    profile.save(profile_path)
 
 
 def get_video_text(yt_link: str) -> str:
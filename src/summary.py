@@ -1,4 +1,9 @@
-from typings import IGenAI, IChunkedText
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from typings import IGenAI, IChunkedText, IThroughputObserver
 from typing import Generator
 
 
@@ -7,14 +12,46 @@ class Summary:
     _chunked_text: IChunkedText
     _source_text: str
     _summary: str
+    _concurrency: int
+    _observer: IThroughputObserver | None
+    _in_flight: dict[int, list[float]]
+    _last_in_flight_change: float
 
     def __init__(
-        self, genai: IGenAI, chunked_text: IChunkedText, source_text: str
+        self,
+        genai: IGenAI,
+        chunked_text: IChunkedText,
+        source_text: str,
+        concurrency: int = 1,
+        observer: IThroughputObserver | None = None,
     ) -> None:
+        """
+        Args:
+            genai (IGenAI): The model used for the summaries.
+
+            chunked_text (IChunkedText): Chunker for each level of the reduce
+            tree.
+
+            source_text (str): The text to summarise.
+
+            concurrency (int, optional): Number of chunks summarised at the
+            same time. Defaults to 1.
+
+            observer (IThroughputObserver | None, optional): Receives the
+            timing of every chunk summary. Defaults to None.
+        """
         self._genai = genai
         self._chunked_text = chunked_text
         self._source_text = source_text
         self._summary = ""
+        self._concurrency = max(1, concurrency)
+        self._observer = observer
+        # Time integral of the number of calls in flight and the start time
+        # of each running call
+        self._in_flight = dict()
+        self._last_in_flight_change = 0.0
+        self._call_ids = itertools.count()
+        self._lock = threading.Lock()
 
     def text(self) -> Generator[str, None, None]:
         if self._summary:
@@ -34,16 +71,59 @@ class Summary:
                 self._summary = ""
 
     def _get_chunks_summaries(self, chunks: list[list[str]]) -> list[str]:
-        chunk_summaries = list()
-        for i, chunk in enumerate(chunks):
-            text = " ".join(chunk)
-            print(f"Summarising chunk {i+1}/{len(chunks)}")
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            return list(
+                executor.map(
+                    self._get_chunk_summary,
+                    range(len(chunks)),
+                    chunks,
+                    [len(chunks)] * len(chunks),
+                )
+            )
+
+    def _get_chunk_summary(self, i: int, chunk: list[str], total: int) -> str:
+        text = " ".join(chunk)
+        print(f"Summarising chunk {i+1}/{total}")
+        call_id = self._start_call()
+        start_time = time.perf_counter()
+        try:
             response = self._genai.generate_response(
                 self.system_message, self.chunk_prompt + text
             )
-            chunk_summaries.append(response)
+        finally:
+            seconds = time.perf_counter() - start_time
+            in_flight = self._end_call(call_id)
+        if self._observer is not None:
+            self._observer.observe(text, response, seconds, in_flight)
+        return response
+
+    def _start_call(self) -> int:
+        with self._lock:
+            now = time.perf_counter()
+            self._update_in_flight(now)
+            call_id = next(self._call_ids)
+            self._in_flight[call_id] = [0.0, now]
+        return call_id
+
+    def _end_call(self, call_id: int) -> float:
+        """
+        Returns the average number of calls in flight during the call,
+        weighted by time.
+        """
+        with self._lock:
+            now = time.perf_counter()
+            self._update_in_flight(now)
+            area, start_time = self._in_flight.pop(call_id)
+        if now <= start_time:
+            return 1.0
+        return area / (now - start_time)
 
-        return chunk_summaries
+    def _update_in_flight(self, now: float):
+        elapsed = now - self._last_in_flight_change
+        in_flight = len(self._in_flight)
+        for call in self._in_flight.values():
+            call[0] += in_flight * elapsed
+        self._last_in_flight_change = now
 
     def _stream_summaries_summary(
         self, chunks_summary: str
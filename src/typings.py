@@ -2,6 +2,12 @@ from typing import Generator, Protocol
 
 
 class IGenAI(Protocol):
+    def warm_up(self):
+        """
+        Gets the model ready before the first call of a job.
+        """
+        ...
+
     def generate_stream(
         self, system_message: str, prompt: str
     ) -> Generator[str, None, None]: ...
@@ -25,3 +31,16 @@ class IChunkedText(Protocol):
 
         """
         ...
+
+
+class IThroughputObserver(Protocol):
+    def observe(self, prompt: str, response: str, seconds: float, in_flight: float):
+        """
+        Args:
+            prompt (str): The prompt sent to the model
+            response (str): The model's response
+            seconds (float): Wall-clock time of the call
+            in_flight (float): Average number of calls running at the same
+            time during this call, weighted by time and including this one
+        """
+        ...